@@ -3,6 +3,7 @@ import json
 from concurrent.futures import ThreadPoolExecutor
 import os
 from collections import namedtuple
+from BKItems import nutrition_record
 
 ItemInfo = namedtuple("ItemInfo", ["id", "name", "image_url", "nutrition", "is_dummy", "category"])
 
@@ -75,16 +76,17 @@ class BKClient:
         return result
 
 
-    def get_menu(self, store_id, session=None):
+    def get_menu(self, store_id, session=None, raw=False):
         """
         Fetches the menu for a Burger King store.
 
         Args:
             store_id (str): The store ID for which the menu needs to be fetched.
             session (requests.Session, optional): A requests session object to use for the request. Defaults to None.
+            raw (bool, optional): If True, return the undecoded response body so callers can hash it before parsing. Defaults to False.
 
         Returns:
-            dict: The menu for the specified store, or None if the menu cannot be fetched.
+            dict: The menu for the specified store, or None if the menu cannot be fetched. If raw is True, the response body as bytes instead.
         """
 
         url = self.menu_template % store_id
@@ -94,6 +96,9 @@ class BKClient:
         else:
             resp = requests.get(url)
 
+        if raw:
+            return resp.content if resp.status_code == 200 else None
+
         if resp.status_code == 200:
             j = resp.json()
 
@@ -160,25 +165,36 @@ class BKClient:
             return j['data']['restaurantsV2']['nearby']['nodes']
         
 
-    def get_many_nearby_stores(self, locations, threads=1):
+    def get_many_nearby_stores(self, locations, threads=1, by_location=False):
         """
         Fetches nearby Burger King stores for multiple locations concurrently.
 
         Args:
             locations (list): A list of (latitude, longitude) tuples for which nearby stores need to be fetched.
             threads (int, optional): The number of threads to use for concurrent requests. Defaults to 1.
+            by_location (bool, optional): If True, keep the results of each location separate. Defaults to False.
 
         Returns:
             dict: A dictionary mapping store IDs to their corresponding store information. If information cannot be fetched for a store (due to an invalid store ID or a failed request), the store ID will not be included in the returned dictionary.
+                If by_location is True, a dictionary mapping each (latitude, longitude) tuple to the list returned by get_nearby_stores instead, with an empty list for locations whose request failed.
         """
 
         results = {}
         
         with ThreadPoolExecutor(max_workers=threads) as executor:
             session = requests.Session()
-            futures = [executor.submit(self.get_nearby_stores, lat, lon, session) for lat, lon in locations]
+            futures = {(lat, lon): executor.submit(self.get_nearby_stores, lat, lon, session) for lat, lon in locations}
+
+            for location, future in futures.items():
+                if by_location:
+                    # one failed location shouldn't lose the results of all the others
+                    try:
+                        results[location] = future.result()
+                    except Exception as e:
+                        print(f"Failed to fetch nearby stores for {location}: {e}")
+                        results[location] = []
+                    continue
 
-            for future in futures:
                 result = future.result()
                 if result:
                     results.update({store['storeId']: store for store in result})
@@ -248,6 +264,7 @@ class BKClient:
 
         Returns:
             ItemInfo: An ItemInfo named tuple containing information about the specified item, or None if the information cannot be fetched.
+                The nutrition field is a BKItems.NUTRITION_DTYPE record with NaN for missing values.
         """
 
         url = self.item_info_template.format(item_id=item_id, query=self.item_info_query)
@@ -287,6 +304,8 @@ class BKClient:
         if nutrition is None:
             nutrition = self.key_sequence_or_none(data, ['Picker', 'options', 0, 'option', 'nutrition'])
 
+        nutrition = nutrition_record(nutrition)
+
         if hierarchy is None:
             hierarchy = self.key_sequence_or_none(data, ['Picker', 'options', 0, 'option', 'productHierarchy', 'L2'])
 
@@ -323,18 +342,19 @@ class BKClient:
         return results
     
 
-    def search_lat_lon(self, lat_start, lat_end, lon_start, lon_end, increment=0.5, ids_only=True):
+    def grid_points(self, lat_start, lat_end, lon_start, lon_end, increment=0.5):
         """
-        Given starting and ending coordinates search the area for Burger King locations and return a list of store IDs if ids_only is True, otherwise a list of dictionary objects representing stores.
+        Returns the grid of search points covering an area, north to south and west to east.
 
         Args:
-            lat_start (float): The starting latitude of the search area.
-            lat_end (float): The ending latitude of the search area.
-            lon_start (float): The starting longitude of the search area.
-            lon_end (float): The ending longitude of the search area.
+            lat_start (float): The northern latitude of the area.
+            lat_end (float): The southern latitude of the area.
+            lon_start (float): The western longitude of the area.
+            lon_end (float): The eastern longitude of the area.
+            increment (float, optional): The spacing of the grid in degrees. Defaults to 0.5.
 
         Returns:
-            list: A list of store IDs if ids_only is True, or a list of store information dictionaries if ids_only is False. Returns an empty list if no stores are found.
+            list: A list of (latitude, longitude) tuples.
         """
 
         intersections = []
@@ -349,6 +369,25 @@ class BKClient:
             cur_lat -= increment
             cur_lon = lon_start
 
+        return intersections
+
+
+    def search_lat_lon(self, lat_start, lat_end, lon_start, lon_end, increment=0.5, ids_only=True):
+        """
+        Given starting and ending coordinates search the area for Burger King locations and return a list of store IDs if ids_only is True, otherwise a list of dictionary objects representing stores.
+
+        Args:
+            lat_start (float): The starting latitude of the search area.
+            lat_end (float): The ending latitude of the search area.
+            lon_start (float): The starting longitude of the search area.
+            lon_end (float): The ending longitude of the search area.
+
+        Returns:
+            list: A list of store IDs if ids_only is True, or a list of store information dictionaries if ids_only is False. Returns an empty list if no stores are found.
+        """
+
+        intersections = self.grid_points(lat_start, lat_end, lon_start, lon_end, increment)
+
         bks = self.get_many_nearby_stores(intersections, threads=10)
 
         return bks
\ No newline at end of file
@@ -1,4 +1,8 @@
 from BKClient import BKClient
+from BKItems import item_columns, save_items, write_items_csv
+from BKMonitor import MenuMonitor, make_sink
+from BKRegistry import StoreRegistry
+from BKRestaurants import RESTAURANT_HEADER, restaurant_columns, restaurant_rows
 import time
 import csv
 import os
@@ -10,36 +14,62 @@ from datetime import datetime
 bkc = BKClient()
 
 
-def search_usa():
-
-    contiguous_states = {
+USA_REGIONS = {
+    "contiguous_states": {
         "lat_start": 49.384358,
         "lat_end": 24.396308,
         "lon_start": -124.848974,
         "lon_end": -66.885444
-    }
-
-    hawaii = {
+    },
+    "hawaii": {
         "lat_start": 22.533,
         "lat_end": 18.709,
         "lon_start": -160.950,
         "lon_end": -154.490
-    }
-
-    alaska = {
+    },
+    "alaska": {
         "lat_start": 71.371,
         "lat_end": 55.304,
         "lon_start": -169.233,
         "lon_end": -140.669
     }
+}
+
+REGISTRY_FILE = f'Temp{os.sep}bk_store_registry.db'
 
-    contiguous_states = bkc.search_lat_lon(**contiguous_states)
-    hawaii = bkc.search_lat_lon(**hawaii)
-    alaska = bkc.search_lat_lon(**alaska)
+
+def search_usa():
+
+    contiguous_states = bkc.search_lat_lon(**USA_REGIONS["contiguous_states"])
+    hawaii = bkc.search_lat_lon(**USA_REGIONS["hawaii"])
+    alaska = bkc.search_lat_lon(**USA_REGIONS["alaska"])
 
     return {**contiguous_states, **hawaii, **alaska}
 
 
+def refresh_stores(registry_file=REGISTRY_FILE):
+    """
+    Update the store registry with today's share of the USA search grid instead of sweeping the whole country.
+
+    Args:
+        registry_file (str, optional): The SQLite file holding the registry. Defaults to REGISTRY_FILE.
+
+    Returns:
+        dict: A dictionary mapping store IDs to store information for every store not marked closed.
+    """
+
+    grid = [point for region in USA_REGIONS.values() for point in bkc.grid_points(**region)]
+
+    registry = StoreRegistry(registry_file)
+    summary = registry.refresh(bkc, grid)
+    stores = registry.open_stores()
+    registry.close()
+
+    print(f"Swept {summary.cells_swept} of {summary.cells_total} grid points: {summary.new_stores} new stores, {summary.closed_stores} closed, {summary.open_stores} open")
+
+    return stores
+
+
 def simple_menu_item(store_id, item):
     """
     If the item has a valid id, isAvailable, price, and calories, return a tuple of those values.  Otherwise, return None.
@@ -93,69 +123,6 @@ def simple_menu(store_id, menu):
     return [item for item in result if item is not None]
 
 
-def simple_restaurant(restaurant):
-    """
-    Extracts selected information from a restaurant object.
-
-    Args:
-        restaurant (dict): A dictionary representing a restaurant.
-
-    Returns:
-        tuple: A tuple of the restaurant's id, storeId, city, state, postalCode, latitude, longitude,
-               status, hasBreakfast, hasDelivery, hasDineIn, hasDriveThru, hasMobileOrdering, hasTakeOut,
-               posVendor, and total_weekly_hours.
-               If any of these values are missing, return None for that value.
-    """
-    restaurant_id = restaurant.get('id')
-    store_id = restaurant.get('storeId')
-    address = restaurant.get('physicalAddress', {})
-    city = address.get('city')
-    state = address.get('stateProvince')
-    postal_code = address.get('postalCode')
-    latitude = restaurant.get('latitude')
-    longitude = restaurant.get('longitude')
-    status = restaurant.get('status')
-    has_breakfast = restaurant.get('hasBreakfast')
-    has_delivery = restaurant.get('hasDelivery')
-    has_dine_in = restaurant.get('hasDineIn')
-    has_drive_thru = restaurant.get('hasDriveThru')
-    has_mobile_ordering = restaurant.get('hasMobileOrdering')
-    has_take_out = restaurant.get('hasTakeOut')
-    pos_vendor = restaurant.get('posVendor')
-
-    # Calculate total weekly hours
-    total_weekly_hours = 0
-    for day in ['mon', 'tue', 'wed', 'thr', 'fri', 'sat', 'sun']:
-        open_time = restaurant.get('diningRoomHours', {}).get(f'{day}Open')
-        close_time = restaurant.get('diningRoomHours', {}).get(f'{day}Close')
-        if open_time and close_time:
-            open_hour, open_minute, _ = map(int, open_time.split(':'))
-            close_hour, close_minute, _ = map(int, close_time.split(':'))
-            total_weekly_hours += (close_hour * 60 + close_minute - open_hour * 60 - open_minute) / 60
-
-    result = (restaurant_id, store_id, city, state, postal_code, latitude, longitude, status,
-              has_breakfast, has_delivery, has_dine_in, has_drive_thru, has_mobile_ordering, has_take_out,
-              pos_vendor, total_weekly_hours)
-
-    return result
-
-
-def simple_restaurants(restaurants):
-    """
-    Return a list of simple_restaurant tuples for each restaurant in the list.
-
-    Args:
-        restaurants (list): A list of dictionaries representing restaurants.
-
-    Returns:
-        list: A list of simple_restaurant tuples.
-    """
-
-    result = [simple_restaurant(restaurant) for restaurant in restaurants]
-
-    return [restaurant for restaurant in result if restaurant is not None]
-
-
 def write_menu_items_to_csv(store_ids):
     """
     Use the BKClient to get the menu items for the given store ids and write the menu items to a CSV file.
@@ -207,17 +174,17 @@ def write_menu_items_to_csv(store_ids):
     return all_item_ids
 
 
-def whole_harvest(upload=False):
-    stores = search_usa()
+def whole_harvest(upload=False, incremental=False):
+    stores = refresh_stores() if incremental else search_usa()
     store_ids = list(stores.keys())
     # prefix for current date YYYY-MM-DD-
     save_prefix = time.strftime("%Y-%m-%d-")
 
     with open(f'Temp{os.sep}{save_prefix}bk_restaurants.csv', 'w', newline='') as file:
         writer = csv.writer(file)
-        writer.writerow(['restaurant_id', 'store_id', 'city', 'state', 'postal_code', 'latitude', 'longitude', 'status', 'has_breakfast', 'has_delivery', 'has_dine_in', 'has_drive_thru', 'has_mobile_ordering', 'has_take_out', 'pos_vendor', 'total_weekly_hours'])
+        writer.writerow(RESTAURANT_HEADER)
 
-        rows = simple_restaurants(stores.values())
+        rows = restaurant_rows(restaurant_columns(stores.values()))
 
         writer.writerows(rows)
     stores = None
@@ -231,18 +198,9 @@ def whole_harvest(upload=False):
 
     all_item_infos = bkc.get_many_item_info(list(all_item_ids), threads=10)
 
-    with open(f'Temp{os.sep}{save_prefix}bk_items.csv', 'w', newline='') as file:
-        # ItemInfo(id='picker_5520', name='Whopper', image_url='https://cdn.sanity.io/images/czqk28jt/prod_bk_us/e8dfc0b5c84670d64195a6602ef7f99eb70fe764-1333x1333.png', nutrition={'calories': 485.215, 'fat': 21.705, 'saturatedFat': 9, 'transFat': 0, 'cholesterol': 70, 'sodium': 583.475, 'carbohydrates': 46.92, 'fiber': 1.975, 'sugar': 8.63, 'proteins': 30.5}, is_dummy=False)
-        writer = csv.writer(file)
-
-        writer.writerow(['item_id', 'name', 'image_url', 'calories', 'fat', 'saturatedFat', 'transFat', 'cholesterol', 'sodium', 'carbohydrates', 'fiber', 'sugar', 'proteins', 'is_dummy', 'category'])
-
-        rows = []
-        for item_id, item_info in all_item_infos.items():
-            row = (item_id, item_info.name, item_info.image_url, item_info.nutrition['calories'] if item_info.nutrition else "", item_info.nutrition['fat'] if item_info.nutrition else "", item_info.nutrition['saturatedFat'] if item_info.nutrition else "", item_info.nutrition['transFat'] if item_info.nutrition else "", item_info.nutrition['cholesterol'] if item_info.nutrition else "", item_info.nutrition['sodium'] if item_info.nutrition else "", item_info.nutrition['carbohydrates'] if item_info.nutrition else "", item_info.nutrition['fiber'] if item_info.nutrition else "", item_info.nutrition['sugar'] if item_info.nutrition else "", item_info.nutrition['proteins'] if item_info.nutrition else "", item_info.is_dummy, item_info.category)
-            rows.append(row)
-
-        writer.writerows(rows)
+    items = item_columns(all_item_infos.values())
+    write_items_csv(items, f'Temp{os.sep}{save_prefix}bk_items.csv')
+    save_items(items, f'Temp{os.sep}{save_prefix}bk_items.npz')
 
     print("Finished all items")
 
@@ -250,70 +208,6 @@ def whole_harvest(upload=False):
         asyncio.run(upload_to_db(item_info=f'Temp{os.sep}{save_prefix}bk_items.csv'))
 
 
-
-def simple_restaurant(restaurant):
-    """
-    Extracts selected information from a restaurant object.
-
-    Args:
-        restaurant (dict): A dictionary representing a restaurant.
-
-    Returns:
-        tuple: A tuple of the restaurant's id, storeId, city, state, postalCode, latitude, longitude,
-               status, hasBreakfast, hasDelivery, hasDineIn, hasDriveThru, hasMobileOrdering, hasTakeOut,
-               posVendor, and total_weekly_hours.
-               If any of these values are missing, return None for that value.
-    """
-    restaurant_id = restaurant.get('id')
-    store_id = restaurant.get('storeId')
-    address = restaurant.get('physicalAddress', {})
-    city = address.get('city')
-    state = address.get('stateProvince')
-    postal_code = address.get('postalCode')
-    latitude = restaurant.get('latitude')
-    longitude = restaurant.get('longitude')
-    status = restaurant.get('status')
-    has_breakfast = restaurant.get('hasBreakfast')
-    has_delivery = restaurant.get('hasDelivery')
-    has_dine_in = restaurant.get('hasDineIn')
-    has_drive_thru = restaurant.get('hasDriveThru')
-    has_mobile_ordering = restaurant.get('hasMobileOrdering')
-    has_take_out = restaurant.get('hasTakeOut')
-    pos_vendor = restaurant.get('posVendor')
-
-    # Calculate total weekly hours
-    total_weekly_hours = 0
-    for day in ['mon', 'tue', 'wed', 'thr', 'fri', 'sat', 'sun']:
-        open_time = restaurant.get('diningRoomHours', {}).get(f'{day}Open')
-        close_time = restaurant.get('diningRoomHours', {}).get(f'{day}Close')
-        if open_time and close_time:
-            open_hour, open_minute, _ = map(int, open_time.split(':'))
-            close_hour, close_minute, _ = map(int, close_time.split(':'))
-            total_weekly_hours += (close_hour * 60 + close_minute - open_hour * 60 - open_minute) / 60
-
-    result = (restaurant_id, store_id, city, state, postal_code, latitude, longitude, status,
-              has_breakfast, has_delivery, has_dine_in, has_drive_thru, has_mobile_ordering, has_take_out,
-              pos_vendor, total_weekly_hours)
-
-    return result
-
-
-def simple_restaurants(restaurants):
-    """
-    Return a list of simple_restaurant tuples for each restaurant in the list.
-
-    Args:
-        restaurants (list): A list of dictionaries representing restaurants.
-
-    Returns:
-        list: A list of simple_restaurant tuples.
-    """
-
-    result = [simple_restaurant(restaurant) for restaurant in restaurants]
-
-    return [restaurant for restaurant in result if restaurant is not None]
-
-
 async def upload_to_db(restaurants=None, menu_items=None, item_info=None):
     """
     Supply a CSV filename to any parameter. Upload the CSV to the respective table in the database.
@@ -348,48 +242,100 @@ async def upload_to_db(restaurants=None, menu_items=None, item_info=None):
 
 
 
-def menu_items_update():
+def latest_restaurants_file():
     """
-    Find the most recent restaurants list in the Temp folder.  Use the store ids to get the most recent menu items from the BK API.
-    Save the menu items to a new CSV file in the Temp folder.
+    Find the most recent restaurants list in the Temp folder.
+
+    Returns:
+        str: The path of the most recent restaurants CSV, or None if there are none.
     """
 
-    # Find the most recent restaurants list in the Temp folder
     files = os.listdir('Temp')
     files = [f for f in files if 'bk_restaurants' in f and f.endswith('.csv')]
     files.sort(reverse=True)
     if len(files) == 0:
         print("No restaurants files found")
-        return
-    restaurants_file = files[0]
+        return None
+
+    return f'Temp{os.sep}{files[0]}'
+
+
+def read_store_ids(filename):
+    """
+    Read the store ids from a restaurants CSV.
+
+    Args:
+        filename (str): The restaurants CSV to read.
+
+    Returns:
+        list: A list of unique store ids.
+    """
 
-    # Read the store ids from the restaurants file
     store_ids = set()
-    filename = f'Temp{os.sep}{restaurants_file}'
     with open(filename, 'r', newline='') as file:
         reader = csv.reader(file)
         next(reader)
         for row in reader:
             store_ids.add(row[1])
 
+    return list(store_ids)
 
-    write_menu_items_to_csv(list(store_ids))
+
+def menu_items_update():
+    """
+    Find the most recent restaurants list in the Temp folder.  Use the store ids to get the most recent menu items from the BK API.
+    Save the menu items to a new CSV file in the Temp folder.
+    """
+
+    filename = latest_restaurants_file()
+    if filename is None:
+        return
+
+    write_menu_items_to_csv(read_store_ids(filename))
 
     return filename
 
 
+def monitor_menus(sink, requests_per_second, duration=None):
+    """
+    Watch the menus of the stores in the most recent restaurants list and emit price changes to the sink until interrupted.
+
+    Args:
+        sink (str): Where to send change events, see BKMonitor.make_sink.
+        requests_per_second (float): The total request budget for the gateway.
+        duration (float, optional): Stop after this many seconds. Defaults to running until interrupted.
+    """
+
+    filename = latest_restaurants_file()
+    if filename is None:
+        return
+
+    monitor = MenuMonitor(bkc, read_store_ids(filename), make_sink(sink), requests_per_second=requests_per_second)
+    monitor.run(duration=duration)
+
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Harvest Burger King data')
     parser.add_argument('--all', action='store_true', help='Get menu items, restaurants, and item info')
     parser.add_argument('--menuitems_only', action='store_true', help='Just get menu items')
     parser.add_argument("--upload", action="store_true", help="Upload the data to the database")
+    parser.add_argument('--incremental', action='store_true', help='With --all, refresh the store registry instead of searching the whole country')
+    parser.add_argument('--refresh_stores', action='store_true', help='Just refresh the store registry')
+    parser.add_argument('--monitor', action='store_true', help='Continuously poll menus and emit price changes')
+    parser.add_argument('--sink', default=f'Temp{os.sep}bk_menu_changes.jsonl', help='Where --monitor sends changes: a .jsonl file, a .db SQLite file, or postgres[:channel] for NOTIFY')
+    parser.add_argument('--rate', type=float, default=2.0, help='Total requests per second for --monitor')
+    parser.add_argument('--duration', type=float, default=None, help='Stop --monitor after this many seconds')
     args = parser.parse_args()
 
     if args.all:
-        whole_harvest(upload=args.upload)
+        whole_harvest(upload=args.upload, incremental=args.incremental)
+    elif args.refresh_stores:
+        refresh_stores()
     elif args.menuitems_only:
         filename = menu_items_update()
         asyncio.run(upload_to_db(menu_items=filename))
+    elif args.monitor:
+        monitor_menus(args.sink, args.rate, duration=args.duration)
     else:
-        print("No arguments given.  Use --menuitems_only to harvest the data or --all to update all information.")
\ No newline at end of file
+        print("No arguments given.  Use --menuitems_only to harvest the data, --all to update all information, --refresh_stores to update the store registry or --monitor to watch for price changes.")
@@ -0,0 +1,150 @@
+import numpy as np
+import csv
+from collections import namedtuple
+
+NUTRITION_FIELDS = ['calories', 'fat', 'saturatedFat', 'transFat', 'cholesterol', 'sodium', 'carbohydrates', 'fiber', 'sugar', 'proteins']
+
+# one float32 per nutrient, NaN when the API has no value
+NUTRITION_DTYPE = np.dtype([(field, np.float32) for field in NUTRITION_FIELDS])
+
+ITEM_HEADER = ['item_id', 'name', 'image_url', *NUTRITION_FIELDS, 'is_dummy', 'category']
+
+ItemColumns = namedtuple("ItemColumns", ["item_id", "name", "image_url", "nutrition", "is_dummy", "category"])
+
+NutrientPerDollar = namedtuple("NutrientPerDollar", ["item_id", "name", "avg_price", "value"])
+
+
+def nutrition_record(nutrition):
+    """
+    Converts the nutrition object of a GetPicker response to a fixed-layout record.
+
+    Args:
+        nutrition (dict): The nutrition dictionary from the API, or None.
+
+    Returns:
+        numpy.void: A NUTRITION_DTYPE record. Missing nutrients, or all of them if nutrition is None, are NaN.
+    """
+
+    values = list(map(nutrition.get, NUTRITION_FIELDS)) if nutrition else [None] * len(NUTRITION_FIELDS)
+
+    return np.array(values, dtype=np.float32).view(NUTRITION_DTYPE)[0]
+
+
+def item_columns(item_infos):
+    """
+    Builds an array-backed column store from ItemInfo named tuples.
+
+    Args:
+        item_infos (list): A list of ItemInfo named tuples, as returned by BKClient.get_many_item_info.
+
+    Returns:
+        ItemColumns: An ItemColumns named tuple. nutrition is a NUTRITION_DTYPE structured array, is_dummy a bool array
+        and the text fields are str arrays.
+    """
+
+    item_infos = list(item_infos)
+
+    return ItemColumns(
+        item_id=np.array([info.id for info in item_infos], dtype=str),
+        name=np.array([info.name or '' for info in item_infos], dtype=str),
+        image_url=np.array([info.image_url or '' for info in item_infos], dtype=str),
+        nutrition=np.array([info.nutrition for info in item_infos], dtype=NUTRITION_DTYPE),
+        is_dummy=np.array([info.is_dummy for info in item_infos], dtype=bool),
+        category=np.array([info.category or '' for info in item_infos], dtype=str),
+    )
+
+
+def write_items_csv(columns, filename):
+    """
+    Writes an ItemColumns store to a CSV file with ITEM_HEADER columns. Missing nutrients are written as empty strings.
+
+    Args:
+        columns (ItemColumns): The columns to write.
+        filename (str): The name of the CSV file.
+    """
+
+    nutrients = []
+    for field in NUTRITION_FIELDS:
+        values = columns.nutrition[field]
+        # %.7g round-trips float32 without printing 485.215 as 485.2149963378906
+        text = np.char.mod('%.7g', values)
+        text[np.isnan(values)] = ''
+        nutrients.append(text.tolist())
+
+    rows = zip(columns.item_id.tolist(), columns.name.tolist(), columns.image_url.tolist(), *nutrients,
+               columns.is_dummy.tolist(), columns.category.tolist())
+
+    with open(filename, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(ITEM_HEADER)
+        writer.writerows(rows)
+
+
+def save_items(columns, filename):
+    """
+    Saves an ItemColumns store to a binary .npz file.
+
+    Args:
+        columns (ItemColumns): The columns to save.
+        filename (str): The name of the .npz file.
+    """
+
+    np.savez(filename, **columns._asdict())
+
+
+def load_items(filename):
+    """
+    Loads an ItemColumns store saved with save_items.
+
+    Args:
+        filename (str): The name of the .npz file.
+
+    Returns:
+        ItemColumns: The loaded columns.
+    """
+
+    with np.load(filename) as data:
+        return ItemColumns(**{field: data[field] for field in ItemColumns._fields})
+
+
+def nutrient_per_dollar(columns, prices_file='bk_data.csv', nutrient='proteins'):
+    """
+    Joins item nutrition against menu prices and ranks items by how much of a nutrient a dollar buys.
+
+    Prices are the default price in cents from a bk_data.csv style file, averaged over every store that sells the item.
+
+    Args:
+        columns (ItemColumns): The item columns.
+        prices_file (str, optional): A CSV written by write_menu_items_to_csv. Defaults to 'bk_data.csv'.
+        nutrient (str, optional): One of NUTRITION_FIELDS. Defaults to 'proteins'.
+
+    Returns:
+        NutrientPerDollar: Arrays of item_id, name, avg_price (dollars) and value (nutrient per dollar), best first.
+        Items without a price or without a value for the nutrient are left out.
+    """
+
+    if len(columns.item_id) == 0:
+        return NutrientPerDollar(columns.item_id, columns.name, np.empty(0), np.empty(0))
+
+    prices = np.loadtxt(prices_file, delimiter=',', skiprows=1, usecols=(1, 5), dtype=str, ndmin=2)
+    price_item_ids = prices[:, 0]
+    price_default = prices[:, 1].astype(np.float64) / 100
+
+    # find the row of each priced item in the item columns, dropping prices for unknown items
+    order = np.argsort(columns.item_id)
+    sorted_ids = columns.item_id[order]
+    positions = np.searchsorted(sorted_ids, price_item_ids).clip(max=len(sorted_ids) - 1)
+    known = sorted_ids[positions] == price_item_ids
+    index = order[positions[known]]
+
+    totals = np.bincount(index, weights=price_default[known], minlength=len(columns.item_id))
+    counts = np.bincount(index, minlength=len(columns.item_id))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_price = totals / counts
+        value = columns.nutrition[nutrient].astype(np.float64) / avg_price
+
+    keep = np.flatnonzero((counts > 0) & (avg_price > 0) & ~np.isnan(value))
+    keep = keep[np.argsort(-value[keep], kind='stable')]
+
+    return NutrientPerDollar(columns.item_id[keep], columns.name[keep], avg_price[keep], value[keep])
@@ -0,0 +1,338 @@
+import asyncio
+import hashlib
+import heapq
+import json
+import os
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+import requests
+
+
+# weight added for a store whose every poll has found a change
+FREQUENCY_WEIGHT = 4.0
+# weight added for a store that changed just now, halving every RECENCY_HALF_LIFE seconds
+RECENCY_WEIGHT = 8.0
+RECENCY_HALF_LIFE = 6 * 60 * 60
+
+
+def menu_prices(menu):
+    """
+    Extracts the monitored fields from a store menu.
+
+    Args:
+        menu (list): A list of dictionaries representing menu items, as returned by BKClient.get_menu.
+
+    Returns:
+        dict: A dictionary mapping item ids to [isAvailable, price_min, price_max, price_default]. Items without a price are skipped.
+    """
+
+    result = {}
+
+    for item in menu or []:
+        price = item.get('price')
+        if not price or item.get('id') is None:
+            continue
+        result[item['id']] = [item.get('isAvailable'), price.get('min'), price.get('max'), price.get('default')]
+
+    return result
+
+
+def diff_prices(store_id, old, new, detected_at):
+    """
+    Compares two menu_prices snapshots for a store and returns a change event for each item that differs.
+
+    Args:
+        store_id (str): The store id the snapshots belong to.
+        old (dict): The previous menu_prices snapshot.
+        new (dict): The current menu_prices snapshot.
+        detected_at (str): ISO timestamp to stamp on the events.
+
+    Returns:
+        list: A list of event dictionaries with store_id, item_id, change ('added', 'removed' or 'changed'), old, new and detected_at.
+    """
+
+    events = []
+
+    for item_id in old.keys() | new.keys():
+        before = old.get(item_id)
+        after = new.get(item_id)
+        if before == after:
+            continue
+        change = 'added' if before is None else 'removed' if after is None else 'changed'
+        events.append({'store_id': store_id, 'item_id': item_id, 'change': change, 'old': before, 'new': after, 'detected_at': detected_at})
+
+    return events
+
+
+class StoreState:
+    """
+    Polling history for a single store.
+    """
+
+    __slots__ = ('store_id', 'digest', 'snapshot', 'polls', 'changes', 'last_change', 'virtual_time')
+
+    def __init__(self, store_id):
+        self.store_id = store_id
+        self.digest = None
+        # zlib-compressed JSON of the last menu_prices, only decoded when the payload hash changes
+        self.snapshot = None
+        self.polls = 0
+        self.changes = 0
+        self.last_change = None
+        self.virtual_time = 0.0
+
+    def weight(self, now):
+        """
+        Returns the store's share of the request budget relative to a store that never changes (weight 1).
+        """
+
+        weight = 1.0
+
+        if self.polls:
+            weight += FREQUENCY_WEIGHT * self.changes / self.polls
+
+        if self.last_change is not None:
+            weight += RECENCY_WEIGHT * 0.5 ** ((now - self.last_change) / RECENCY_HALF_LIFE)
+
+        return weight
+
+
+class FileSink:
+    """
+    Appends change events to a file as JSON lines.
+    """
+
+    def __init__(self, filename):
+        self.file = open(filename, 'a')
+
+    def emit(self, events):
+        for event in events:
+            self.file.write(json.dumps(event) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class SQLiteSink:
+    """
+    Inserts change events into the bk_menu_changes table of a SQLite database.
+    """
+
+    def __init__(self, filename):
+        self.conn = sqlite3.connect(filename)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS bk_menu_changes (store_id TEXT, item_id TEXT, change TEXT, old TEXT, new TEXT, detected_at TEXT)')
+
+    def emit(self, events):
+        rows = [(e['store_id'], e['item_id'], e['change'], json.dumps(e['old']), json.dumps(e['new']), e['detected_at']) for e in events]
+        with self.conn:
+            self.conn.executemany('INSERT INTO bk_menu_changes (store_id, item_id, change, old, new, detected_at) VALUES (?, ?, ?, ?, ?, ?)', rows)
+
+    def close(self):
+        self.conn.close()
+
+
+class PostgresSink:
+    """
+    Sends each change event as a JSON payload on a Postgres NOTIFY channel.
+    """
+
+    def __init__(self, channel='bk_menu_changes'):
+        import asyncpg
+
+        postgres_password = os.environ.get("POSTGRES_PASSWORD", "postgres123")
+
+        self.channel = channel
+        self.loop = asyncio.new_event_loop()
+        self.conn = self.loop.run_until_complete(asyncpg.connect('postgresql://localhost:5432', user='postgres', password=postgres_password, database='inflation'))
+
+    def emit(self, events):
+        self.loop.run_until_complete(self.conn.executemany('SELECT pg_notify($1, $2)', [(self.channel, json.dumps(event)) for event in events]))
+
+    def close(self):
+        self.loop.run_until_complete(self.conn.close())
+        self.loop.close()
+
+
+def make_sink(target):
+    """
+    Builds a sink from a command line target.
+
+    Args:
+        target (str): 'postgres' or 'postgres:<channel>' for NOTIFY, a path ending in .db/.sqlite/.sqlite3 for SQLite, otherwise a JSON lines file.
+
+    Returns:
+        A sink with emit(events) and close() methods.
+    """
+
+    if target == 'postgres' or target.startswith('postgres:'):
+        channel = target.partition(':')[2]
+        return PostgresSink(channel) if channel else PostgresSink()
+
+    if target.endswith(('.db', '.sqlite', '.sqlite3')):
+        return SQLiteSink(target)
+
+    return FileSink(target)
+
+
+class MenuMonitor:
+    """
+    Polls store menus continuously at a fixed total request rate and emits an event for every price or availability change.
+
+    Stores are scheduled with stride scheduling: each poll advances a store's virtual time by 1 / weight, and the store
+    with the lowest virtual time is polled next. Stores that change often or changed recently get a larger weight and
+    therefore a larger share of the budget, while the pacer keeps the total rate to the gateway at requests_per_second.
+    """
+
+    def __init__(self, client, store_ids, sink, requests_per_second=2.0, threads=10):
+        """
+        Args:
+            client (BKClient): The client used to fetch menus.
+            store_ids (list): The store ids to monitor.
+            sink: Where change events are sent, see make_sink.
+            requests_per_second (float, optional): The total request budget. Defaults to 2.0.
+            threads (int, optional): The maximum number of requests in flight. Defaults to 10.
+        """
+
+        self.client = client
+        self.sink = sink
+        self.requests_per_second = requests_per_second
+        self.threads = threads
+
+        self.stores = {store_id: StoreState(store_id) for store_id in store_ids}
+        self.queue = [(0.0, store_id) for store_id in self.stores]
+        heapq.heapify(self.queue)
+
+        self.session = requests.Session()
+        self.requests = 0
+        self.skipped = 0
+        self.events = 0
+
+
+    def fetch(self, store_id):
+        try:
+            return store_id, self.client.get_menu(store_id, self.session, raw=True)
+        except Exception as e:
+            print(f"Failed to fetch menu for {store_id}: {e}")
+            return store_id, None
+
+
+    def handle(self, store_id, payload, now):
+        """
+        Records a poll result, emits any change events and puts the store back on the queue.
+        """
+
+        state = self.stores[store_id]
+        state.polls += 1
+
+        if payload is not None:
+            self.record(state, payload, now)
+
+        state.virtual_time += 1 / state.weight(now)
+        heapq.heappush(self.queue, (state.virtual_time, store_id))
+
+
+    def record(self, state, payload, now):
+        """
+        Compares a menu payload with the store's last snapshot and emits any changes.
+
+        Replies that are not JSON, carry no storeMenu list (e.g. a GraphQL error) or cannot be sent to the sink count
+        as failed polls: the digest and snapshot are left alone so the next good poll is compared with the last good one.
+        """
+
+        store_id = state.store_id
+        digest = hashlib.blake2b(payload, digest_size=16).digest()
+
+        if digest == state.digest:
+            self.skipped += 1
+            return
+
+        try:
+            j = json.loads(payload)
+        except ValueError as e:
+            print(f"Failed to decode menu for {store_id}: {e}")
+            return
+
+        menu = (j.get('data') or {}).get('storeMenu') if isinstance(j, dict) else None
+        if not isinstance(menu, list):
+            print(f"No menu in response for {store_id}: {j.get('errors') if isinstance(j, dict) else j}")
+            return
+
+        prices = menu_prices(menu)
+
+        if state.snapshot is not None:
+            old = json.loads(zlib.decompress(state.snapshot))
+            events = diff_prices(store_id, old, prices, datetime.now().isoformat(timespec='seconds'))
+            if events:
+                try:
+                    self.sink.emit(events)
+                except Exception as e:
+                    print(f"Failed to emit changes for {store_id}: {e}")
+                    return
+                self.events += len(events)
+                state.changes += 1
+                state.last_change = now
+
+        state.digest = digest
+        state.snapshot = zlib.compress(json.dumps(prices).encode())
+
+
+    def run(self, duration=None, report_every=300):
+        """
+        Polls until interrupted, or for duration seconds if given.
+
+        Requests are started on a fixed schedule of requests_per_second, independent of how long each one takes, so the
+        per-store polling intervals stretch and shrink with their weights while the total rate stays fixed.
+        """
+
+        if not self.stores:
+            print("No stores to monitor")
+            return
+
+        interval = 1 / self.requests_per_second
+        start = time.monotonic()
+        next_request = start
+        next_report = start + report_every
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            try:
+                while duration is None or time.monotonic() - start < duration:
+                    now = time.monotonic()
+
+                    if in_flight:
+                        timeout = max(0.0, next_request - now) if self.queue and len(in_flight) < self.threads else None
+                        done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self.handle(*future.result(), time.monotonic())
+                    elif next_request > now:
+                        time.sleep(next_request - now)
+
+                    now = time.monotonic()
+                    if now >= next_report:
+                        print(f"{self.requests} requests, {self.skipped} unchanged, {self.events} change events")
+                        next_report = now + report_every
+
+                    if now < next_request or not self.queue or len(in_flight) >= self.threads:
+                        continue
+
+                    # after a stall catch up by at most one request rather than bursting
+                    next_request = max(next_request, now - interval) + interval
+
+                    _, store_id = heapq.heappop(self.queue)
+                    in_flight.add(executor.submit(self.fetch, store_id))
+                    self.requests += 1
+
+            except KeyboardInterrupt:
+                print("Stopping monitor")
+
+            finally:
+                try:
+                    for future in wait(in_flight).done:
+                        self.handle(*future.result(), time.monotonic())
+                finally:
+                    self.sink.close()
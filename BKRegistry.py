@@ -0,0 +1,183 @@
+import json
+import math
+import sqlite3
+import zlib
+from collections import namedtuple
+from datetime import date
+
+# GetNearbyRestaurants returns at most this many stores, nearest first
+PAGE_SIZE = 100
+
+RefreshSummary = namedtuple("RefreshSummary", ["cells_swept", "cells_total", "new_stores", "closed_stores", "open_stores"])
+
+
+def cell_id(lat, lon):
+    return f'{lat:.4f},{lon:.4f}'
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    """
+    Returns the great-circle distance between two points in kilometers.
+    """
+
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+
+    return 2 * 6371.0 * math.asin(math.sqrt(a))
+
+
+class StoreRegistry:
+    """
+    A SQLite registry of every store seen across runs, and of which stores each search grid point returned.
+
+    Instead of sweeping the whole grid on every run, refresh re-queries the grid points whose store set changed in the
+    last recent_days, plus a rotating 1 / rotation_days slice of the grid. Every point is swept at least once every
+    rotation_days, so a new store is found within that many days.
+
+    A store counts as missing from a sweep when a swept point that used to return it no longer does, even though it is
+    closer than the farthest store the point returned, and no other point returned it that day. Such points are swept
+    daily until the store shows up again or has been missing from closed_after consecutive sweeps and is marked closed.
+    """
+
+    def __init__(self, filename):
+        self.conn = sqlite3.connect(filename)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS stores (store_id TEXT PRIMARY KEY, first_seen TEXT, last_seen TEXT, missed_sweeps INTEGER, closed_on TEXT, node TEXT);
+            CREATE TABLE IF NOT EXISTS cells (cell_id TEXT PRIMARY KEY, lat REAL, lon REAL, last_swept TEXT, last_changed TEXT);
+            CREATE TABLE IF NOT EXISTS cell_stores (cell_id TEXT, store_id TEXT, PRIMARY KEY (cell_id, store_id));
+        """)
+
+
+    def due_cells(self, grid, today, rotation_days, recent_days):
+        """
+        Picks the grid points to sweep today.
+
+        Args:
+            grid (list): A list of (latitude, longitude) tuples covering the search area.
+            today (datetime.date): The date of the sweep.
+            rotation_days (int): Every point is swept at least once in this many days.
+            recent_days (int): Points whose store set changed within this many days are swept every day.
+
+        Returns:
+            list: The (latitude, longitude) tuples to sweep.
+        """
+
+        cells = {row[0]: row[1:] for row in self.conn.execute('SELECT cell_id, last_swept, last_changed FROM cells')}
+
+        due = []
+        for lat, lon in grid:
+            key = cell_id(lat, lon)
+            last_swept, last_changed = cells.get(key, (None, None))
+
+            if last_swept is None:
+                due.append((lat, lon))
+                continue
+
+            if date.fromisoformat(last_swept) >= today:
+                continue
+
+            changed_recently = last_changed is not None and (today - date.fromisoformat(last_changed)).days <= recent_days
+            overdue = (today - date.fromisoformat(last_swept)).days >= rotation_days
+            in_slice = zlib.crc32(key.encode()) % rotation_days == today.toordinal() % rotation_days
+
+            if changed_recently or overdue or in_slice:
+                due.append((lat, lon))
+
+        return due
+
+
+    def refresh(self, client, grid, today=None, rotation_days=14, recent_days=7, closed_after=3, threads=10):
+        """
+        Sweeps today's share of the grid and updates the registry.
+
+        Args:
+            client (BKClient): The client used to query nearby stores.
+            grid (list): A list of (latitude, longitude) tuples covering the search area.
+            today (datetime.date, optional): The date of the sweep. Defaults to today.
+            rotation_days (int, optional): Every point is swept at least once in this many days. Defaults to 14.
+            recent_days (int, optional): Points whose store set changed within this many days are swept every day. Defaults to 7.
+            closed_after (int, optional): Mark a store closed after it is missing from this many consecutive sweeps. Defaults to 3.
+            threads (int, optional): The number of threads to use for concurrent requests. Defaults to 10.
+
+        Returns:
+            RefreshSummary: Counts of swept points, new stores, stores closed today and open stores.
+        """
+
+        today = today or date.today()
+        today_str = today.isoformat()
+
+        due = self.due_cells(grid, today, rotation_days, recent_days)
+        results = client.get_many_nearby_stores(due, threads=threads, by_location=True)
+
+        seen = {}
+        candidates = set()
+
+        with self.conn:
+            for (lat, lon), nodes in results.items():
+                # every point is within the search radius of some store, so an empty result means the request failed
+                if not nodes:
+                    continue
+
+                key = cell_id(lat, lon)
+                ids = {node['storeId'] for node in nodes}
+                seen.update({node['storeId']: node for node in nodes})
+
+                previous = {row[0] for row in self.conn.execute('SELECT store_id FROM cell_stores WHERE cell_id = ?', (key,))}
+                swept_before = self.conn.execute('SELECT last_swept FROM cells WHERE cell_id = ?', (key,)).fetchone()
+
+                # with a full page, stores beyond the farthest one returned may simply have been pushed out
+                if len(nodes) >= PAGE_SIZE:
+                    radius = max((distance_km(lat, lon, node['latitude'], node['longitude']) for node in nodes if node.get('latitude') is not None), default=0.0)
+                else:
+                    radius = math.inf
+
+                for store_id in previous - ids:
+                    row = self.conn.execute('SELECT node FROM stores WHERE store_id = ?', (store_id,)).fetchone()
+                    node = json.loads(row[0]) if row else {}
+                    if node.get('latitude') is not None and distance_km(lat, lon, node['latitude'], node['longitude']) < radius:
+                        candidates.add((key, store_id))
+
+                changed = swept_before is not None and previous != ids
+
+                self.conn.execute('INSERT OR IGNORE INTO cells (cell_id, lat, lon) VALUES (?, ?, ?)', (key, lat, lon))
+                self.conn.execute('UPDATE cells SET last_swept = ? WHERE cell_id = ?', (today_str, key))
+                if changed:
+                    self.conn.execute('UPDATE cells SET last_changed = ? WHERE cell_id = ?', (today_str, key))
+
+                self.conn.execute('DELETE FROM cell_stores WHERE cell_id = ?', (key,))
+                self.conn.executemany('INSERT INTO cell_stores (cell_id, store_id) VALUES (?, ?)', [(key, store_id) for store_id in ids])
+
+            known = {row[0] for row in self.conn.execute('SELECT store_id FROM stores')}
+            new_stores = len(seen.keys() - known)
+
+            self.conn.executemany('INSERT OR IGNORE INTO stores (store_id, first_seen, missed_sweeps) VALUES (?, ?, 0)', [(store_id, today_str) for store_id in seen])
+            self.conn.executemany('UPDATE stores SET last_seen = ?, missed_sweeps = 0, closed_on = NULL, node = ? WHERE store_id = ?', [(today_str, json.dumps(node), store_id) for store_id, node in seen.items()])
+
+            candidates = {(key, store_id) for key, store_id in candidates if store_id not in seen}
+            missing = {store_id for _, store_id in candidates}
+            self.conn.executemany('UPDATE stores SET missed_sweeps = missed_sweeps + 1 WHERE store_id = ?', [(store_id,) for store_id in missing])
+            closed = self.conn.execute('UPDATE stores SET closed_on = ? WHERE closed_on IS NULL AND missed_sweeps >= ?', (today_str, closed_after)).rowcount
+
+            # keep missing stores on their points until they are closed, so those points keep counting as changed
+            # and are swept daily until the store shows up again or reaches closed_after misses
+            still_open = {row[0] for row in self.conn.execute(f'SELECT store_id FROM stores WHERE closed_on IS NULL AND store_id IN ({",".join("?" * len(missing))})', list(missing))}
+            self.conn.executemany('INSERT OR IGNORE INTO cell_stores (cell_id, store_id) VALUES (?, ?)', [pair for pair in candidates if pair[1] in still_open])
+
+        open_stores = self.conn.execute('SELECT COUNT(*) FROM stores WHERE closed_on IS NULL').fetchone()[0]
+
+        return RefreshSummary(len(due), len(grid), new_stores, closed, open_stores)
+
+
+    def open_stores(self):
+        """
+        Returns the last seen store information of every store that is not marked closed.
+
+        Returns:
+            dict: A dictionary mapping store IDs to their store information, like BKClient.get_many_nearby_stores.
+        """
+
+        return {store_id: json.loads(node) for store_id, node in self.conn.execute('SELECT store_id, node FROM stores WHERE closed_on IS NULL')}
+
+
+    def close(self):
+        self.conn.close()
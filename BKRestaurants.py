@@ -0,0 +1,255 @@
+import numpy as np
+from collections import namedtuple
+
+DAYS = ['mon', 'tue', 'wed', 'thr', 'fri', 'sat', 'sun']
+
+FLAG_FIELDS = ['hasBreakfast', 'hasDelivery', 'hasDineIn', 'hasDriveThru', 'hasMobileOrdering', 'hasTakeOut']
+
+# column name -> key of the HoursOfOperation object on a nearby-store node
+HOURS_FIELDS = {
+    'dining_room': 'diningRoomHours',
+    'drive_thru': 'driveThruHours',
+    'delivery': 'deliveryHours',
+}
+
+RESTAURANT_HEADER = ['restaurant_id', 'store_id', 'city', 'state', 'postal_code', 'latitude', 'longitude', 'status', 'has_breakfast', 'has_delivery', 'has_dine_in', 'has_drive_thru', 'has_mobile_ordering', 'has_take_out', 'pos_vendor', 'total_weekly_hours', 'drive_thru_weekly_hours', 'delivery_weekly_hours']
+
+# flags are stored as int8 codes, -1 marks a flag missing from the store node
+FLAG_VALUES = {1: True, 0: False, -1: None}
+
+RestaurantColumns = namedtuple("RestaurantColumns", ["restaurant_id", "store_id", "city", "state", "postal_code", "status", "pos_vendor", "latitude", "longitude", "flags", "dining_room_minutes", "drive_thru_minutes", "delivery_minutes"])
+
+_OPEN_KEYS = [f'{day}Open' for day in DAYS]
+_CLOSE_KEYS = [f'{day}Close' for day in DAYS]
+_EMPTY = [''] * len(DAYS)
+
+
+def simple_restaurant(restaurant):
+    """
+    Extracts selected information from a restaurant object.
+
+    Args:
+        restaurant (dict): A dictionary representing a restaurant.
+
+    Returns:
+        tuple: A tuple of the restaurant's id, storeId, city, state, postalCode, latitude, longitude,
+               status, hasBreakfast, hasDelivery, hasDineIn, hasDriveThru, hasMobileOrdering, hasTakeOut,
+               posVendor, and total_weekly_hours.
+               If any of these values are missing, return None for that value.
+    """
+    restaurant_id = restaurant.get('id')
+    store_id = restaurant.get('storeId')
+    address = restaurant.get('physicalAddress', {})
+    city = address.get('city')
+    state = address.get('stateProvince')
+    postal_code = address.get('postalCode')
+    latitude = restaurant.get('latitude')
+    longitude = restaurant.get('longitude')
+    status = restaurant.get('status')
+    has_breakfast = restaurant.get('hasBreakfast')
+    has_delivery = restaurant.get('hasDelivery')
+    has_dine_in = restaurant.get('hasDineIn')
+    has_drive_thru = restaurant.get('hasDriveThru')
+    has_mobile_ordering = restaurant.get('hasMobileOrdering')
+    has_take_out = restaurant.get('hasTakeOut')
+    pos_vendor = restaurant.get('posVendor')
+
+    # Calculate total weekly hours
+    total_weekly_hours = 0
+    dining_room_hours = restaurant.get('diningRoomHours', {})
+    for day in DAYS:
+        open_time = dining_room_hours.get(f'{day}Open')
+        close_time = dining_room_hours.get(f'{day}Close')
+        if open_time and close_time:
+            open_hour, open_minute, _ = map(int, open_time.split(':'))
+            close_hour, close_minute, _ = map(int, close_time.split(':'))
+            total_weekly_hours += (close_hour * 60 + close_minute - open_hour * 60 - open_minute) / 60
+
+    result = (restaurant_id, store_id, city, state, postal_code, latitude, longitude, status,
+              has_breakfast, has_delivery, has_dine_in, has_drive_thru, has_mobile_ordering, has_take_out,
+              pos_vendor, total_weekly_hours)
+
+    return result
+
+
+def simple_restaurants(restaurants):
+    """
+    Return a list of simple_restaurant tuples for each restaurant in the list.
+
+    Args:
+        restaurants (list): A list of dictionaries representing restaurants.
+
+    Returns:
+        list: A list of simple_restaurant tuples.
+    """
+
+    result = [simple_restaurant(restaurant) for restaurant in restaurants]
+
+    return [restaurant for restaurant in result if restaurant is not None]
+
+
+def parse_minutes(times):
+    """
+    Converts a list of 'HH:MM:SS' strings to minutes after midnight in one vectorized pass.
+
+    Args:
+        times (list): A list of time strings. Empty strings and None mark missing times.
+
+    Returns:
+        numpy.ndarray: A float32 array of minutes after midnight, NaN where the time is missing.
+    """
+
+    raw = np.array(times, dtype='S8')
+    chars = raw.view(np.uint8).reshape(len(times), 8)
+    digits = chars.astype(np.int16) - ord('0')
+
+    minutes = ((digits[:, 0] * 10 + digits[:, 1]) * 60 + digits[:, 3] * 10 + digits[:, 4]).astype(np.float32)
+
+    # null times from the API come through the bytes conversion as b'None'
+    present = (raw != b'') & (raw != b'None')
+    minutes[~present] = np.nan
+
+    # anything not shaped like HH:MM:SS (e.g. '6:00:00') takes the slow path
+    well_formed = (chars[:, 2] == ord(':')) & (chars[:, 5] == ord(':'))
+    for i in np.flatnonzero(present & ~well_formed):
+        hour, minute, _ = map(int, times[i].split(':'))
+        minutes[i] = hour * 60 + minute
+
+    return minutes
+
+
+def flag_codes(values):
+    """
+    Converts a list of True/False/None flags to int8 codes.
+
+    Args:
+        values (list): A list of flag values.
+
+    Returns:
+        numpy.ndarray: An int8 array with 1 for True, 0 for False and -1 for anything else.
+    """
+
+    values = np.array(values, dtype=object)
+    codes = np.full(len(values), -1, dtype=np.int8)
+    codes[values == True] = 1
+    codes[values == False] = 0
+
+    return codes
+
+
+def restaurant_columns(restaurants):
+    """
+    Builds columnar arrays from a list of nearby-store nodes in a single pass.
+
+    Args:
+        restaurants (list): A list of dictionaries representing restaurants, as returned by BKClient.get_nearby_stores.
+
+    Returns:
+        RestaurantColumns: A RestaurantColumns named tuple. Text fields are object arrays, latitude and longitude are
+        float64 arrays (NaN when missing), flags is an (n, 6) int8 array in FLAG_FIELDS order (-1 when missing) and
+        each *_minutes field is an (n, 7) float32 array of open minutes per day, mon through sun (NaN when closed or unknown).
+        Drive-thru and delivery hours that close at or before they open run past midnight and get 24 hours added.
+        Dining room minutes are plain close - open, exactly as simple_restaurant computes them, so they can be negative.
+    """
+
+    restaurants = list(restaurants)
+    n = len(restaurants)
+
+    text = [[] for _ in range(7)]
+    latitude, longitude, flags = [], [], []
+    opens = {column: [] for column in HOURS_FIELDS}
+    closes = {column: [] for column in HOURS_FIELDS}
+
+    for restaurant in restaurants:
+        address = restaurant.get('physicalAddress') or {}
+        text[0].append(restaurant.get('id'))
+        text[1].append(restaurant.get('storeId'))
+        text[2].append(address.get('city'))
+        text[3].append(address.get('stateProvince'))
+        text[4].append(address.get('postalCode'))
+        text[5].append(restaurant.get('status'))
+        text[6].append(restaurant.get('posVendor'))
+        latitude.append(restaurant.get('latitude'))
+        longitude.append(restaurant.get('longitude'))
+        flags.extend(map(restaurant.get, FLAG_FIELDS))
+
+        for column, field in HOURS_FIELDS.items():
+            hours = restaurant.get(field) or {}
+            opens[column].extend(map(hours.get, _OPEN_KEYS, _EMPTY))
+            closes[column].extend(map(hours.get, _CLOSE_KEYS, _EMPTY))
+
+    text_columns = []
+    for values in text:
+        column = np.empty(n, dtype=object)
+        column[:] = values
+        text_columns.append(column)
+
+    minutes = {}
+    for column in HOURS_FIELDS:
+        open_minutes = parse_minutes(opens[column]).reshape(n, len(DAYS))
+        close_minutes = parse_minutes(closes[column]).reshape(n, len(DAYS))
+        day_minutes = close_minutes - open_minutes
+        # dining room keeps simple_restaurant's arithmetic so total_weekly_hours is unchanged
+        if column != 'dining_room':
+            day_minutes[day_minutes <= 0] += 24 * 60
+        minutes[column] = day_minutes
+
+    return RestaurantColumns(
+        *text_columns,
+        latitude=np.array(latitude, dtype=np.float64),
+        longitude=np.array(longitude, dtype=np.float64),
+        flags=flag_codes(flags).reshape(n, len(FLAG_FIELDS)),
+        dining_room_minutes=minutes['dining_room'],
+        drive_thru_minutes=minutes['drive_thru'],
+        delivery_minutes=minutes['delivery'],
+    )
+
+
+def weekly_hours(minutes):
+    """
+    Sums an (n, 7) array of open minutes per day into weekly hours per store.
+
+    Days are accumulated in order, so for dining room minutes the result is bit-for-bit equal to simple_restaurant.
+
+    Args:
+        minutes (numpy.ndarray): An (n, 7) array of open minutes per day, NaN for days that are skipped.
+
+    Returns:
+        numpy.ndarray: A float64 array of weekly open hours, 0 for stores with no hours.
+    """
+
+    hours = minutes.astype(np.float64) / 60
+    hours[np.isnan(hours)] = 0.0
+
+    total = np.zeros(len(minutes), dtype=np.float64)
+    for day in range(len(DAYS)):
+        total += hours[:, day]
+
+    return total
+
+
+def restaurant_rows(columns):
+    """
+    Converts RestaurantColumns back to rows in RESTAURANT_HEADER order for writing to CSV.
+
+    Args:
+        columns (RestaurantColumns): The columns returned by restaurant_columns.
+
+    Returns:
+        list: A list of tuples, one per restaurant.
+    """
+
+    def nan_to_none(values):
+        return [None if value != value else value for value in values.tolist()]
+
+    flags = [[FLAG_VALUES[code] for code in column] for column in columns.flags.T.tolist()]
+
+    return list(zip(
+        columns.restaurant_id, columns.store_id, columns.city, columns.state, columns.postal_code,
+        nan_to_none(columns.latitude), nan_to_none(columns.longitude), columns.status,
+        *flags,
+        columns.pos_vendor,
+        weekly_hours(columns.dining_room_minutes).tolist(),
+        weekly_hours(columns.drive_thru_minutes).tolist(),
+        weekly_hours(columns.delivery_minutes).tolist(),
+    ))
@@ -0,0 +1,97 @@
+from BKRestaurants import HOURS_FIELDS, DAYS, restaurant_columns, restaurant_rows, simple_restaurants, weekly_hours
+import argparse
+import random
+import time
+import numpy as np
+
+
+def synthetic_restaurants(count, seed=0):
+    """
+    Builds a list of fake nearby-store nodes shaped like the GetNearbyRestaurants response.
+
+    Args:
+        count (int): The number of stores to generate.
+        seed (int, optional): The random seed. Defaults to 0.
+
+    Returns:
+        list: A list of dictionaries representing restaurants.
+    """
+
+    rng = random.Random(seed)
+
+    def hours():
+        if rng.random() < 0.05:
+            return {}
+        result = {}
+        for day in DAYS:
+            if rng.random() < 0.1:
+                continue
+            result[f'{day}Open'] = f'{rng.randint(5, 10):02d}:{rng.choice([0, 30]):02d}:00'
+            result[f'{day}Close'] = f'{rng.randint(17, 23):02d}:{rng.choice([0, 15, 30, 45]):02d}:00'
+        return result
+
+    restaurants = []
+    for i in range(count):
+        restaurant = {
+            'id': f'restaurant_{i}',
+            'storeId': str(i),
+            'physicalAddress': {'city': 'CITY', 'stateProvince': 'State', 'postalCode': '00000'},
+            'latitude': rng.uniform(24, 49),
+            'longitude': rng.uniform(-124, -67),
+            'status': 'Open',
+            'hasBreakfast': rng.random() < 0.9,
+            'hasDelivery': rng.random() < 0.7,
+            'hasDineIn': rng.random() < 0.8,
+            'hasDriveThru': rng.random() < 0.95,
+            'hasMobileOrdering': rng.random() < 0.9,
+            'hasTakeOut': True,
+            'posVendor': 'SICOM',
+        }
+        for field in HOURS_FIELDS.values():
+            restaurant[field] = hours()
+        restaurants.append(restaurant)
+
+    return restaurants
+
+
+def best_of(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the per-dict and columnar restaurant transforms')
+    parser.add_argument('--count', type=int, default=100_000, help='Number of synthetic stores')
+    parser.add_argument('--repeat', type=int, default=3, help='Take the best of this many runs')
+    args = parser.parse_args()
+
+    restaurants = synthetic_restaurants(args.count)
+
+    # the per-dict path only covers dining room hours, so time it once per hours field to compare like for like
+    other_hours = [[{'diningRoomHours': r[field]} for r in restaurants] for field in ['driveThruHours', 'deliveryHours']]
+
+    def per_dict():
+        rows = simple_restaurants(restaurants)
+        for wrapped in other_hours:
+            simple_restaurants(wrapped)
+        return rows
+
+    def columnar():
+        columns = restaurant_columns(restaurants)
+        return columns, [weekly_hours(getattr(columns, f'{column}_minutes')) for column in HOURS_FIELDS]
+
+    per_dict_time, rows = best_of(per_dict, args.repeat)
+    columnar_time, (columns, totals) = best_of(columnar, args.repeat)
+    rows_time, _ = best_of(lambda: restaurant_rows(columns), args.repeat)
+
+    assert np.array_equal(totals[0], np.array([row[-1] for row in rows])), "weekly hours differ between paths"
+
+    print(f"stores:                  {args.count:,}")
+    print(f"per-dict (3 hour kinds): {per_dict_time:.3f}s")
+    print(f"columnar + aggregates:   {columnar_time:.3f}s  ({per_dict_time / columnar_time:.1f}x)")
+    print(f"columns -> CSV rows:     {rows_time:.3f}s")